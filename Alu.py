@@ -23,102 +23,679 @@ Supports: PDF, image (PNG/JPG), DOCX (via Word->PDF), XLSX (via Excel->PDF).
 Uses PyMuPDF to locate text and draw red, unfilled bounding boxes as annotations.
 
 Notes:
-- Word/XLSX conversion to PDF requires MS Office (Windows) or another conversion tool.
+- Word/XLSX conversion to PDF uses a headless LibreOffice (`soffice`) when available, otherwise
+  MS Office COM (Windows).
 - This library never overwrites the input file; it writes annotated output files.
 """
 
 import os
+import re
+import math
+import atexit
+import shutil
+import socket
+import subprocess
+import time
+import hashlib
+import importlib.util
 import fitz  # PyMuPDF
-from PIL import Image, ImageDraw
 import tempfile
+from pathlib import Path
+from typing import List, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+
+_SEARCH_CACHE_DOCS = 16
+# (pdf_path, mtime, normalized search terms) -> {page_index: tuple of rect tuples}, oldest first
+_SEARCH_CACHE: OrderedDict = OrderedDict()
+
+
+def _normalize(text):
+    # search_for ignores case and matches across line breaks
+    return " ".join(text.lower().split())
+
+
+def _search_flags(search_text):
+    # ASCII queries let MuPDF expand ligatures (e.g. "ﬁ" -> "fi"), which is the cheaper path;
+    # non-ASCII queries keep ligatures as-is and are searched more slowly.
+    flags = fitz.TEXT_DEHYPHENATE | fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+    if not search_text.isascii():
+        flags |= fitz.TEXT_PRESERVE_LIGATURES
+    return flags
+
+
+def _iou(a, b):
+    inter = a & b
+    if inter.is_empty:
+        return 0.0
+    overlap = inter.get_area()
+    return overlap / (a.get_area() + b.get_area() - overlap)
+
+
+def _dedup_rects(rects):
+    # search_for can report a hit twice (line breaks, dehyphenation); drop exact repeats
+    # and boxes that overlap an already kept one by IoU > 0.9, comparing only nearby rows.
+    # IoU > 0.9 implies the tops differ by less than height / 9, which sizes the row window.
+    kept = []
+    seen = set()
+    rows = {}
+    for r in rects:
+        key = (round(r.x0, 1), round(r.y0, 1), round(r.x1, 1), round(r.y1, 1))
+        if key in seen:
+            continue
+        row = math.floor(r.y0)
+        reach = r.height / 9
+        near = range(math.floor(r.y0 - reach), math.floor(r.y0 + reach) + 1)
+        if any(_iou(r, kept[j]) > 0.9 for y in near for j in rows.get(y, ())):
+            continue
+        seen.add(key)
+        rows.setdefault(row, []).append(len(kept))
+        kept.append(r)
+    return kept
+
+
+def _search_cache_pages(key):
+    # Page results of one document and query. Whole documents are evicted, least recently
+    # used first, so a scan of a long document never pushes out its own earlier pages.
+    pages = _SEARCH_CACHE.get(key)
+    if pages is None:
+        pages = _SEARCH_CACHE[key] = {}
+        while len(_SEARCH_CACHE) > _SEARCH_CACHE_DOCS:
+            _SEARCH_CACHE.popitem(last=False)
+    else:
+        _SEARCH_CACHE.move_to_end(key)
+    return pages
+
+
+# Office COM instances shared by every conversion in this process, keyed by ProgID
+_office_apps = {}
+
+
+def _get_office_app(prog_id: str):
+    # Starting Word/Excel costs seconds: reuse an instance that is already running,
+    # otherwise launch one at most once and quit it at exit
+    entry = _office_apps.get(prog_id)
+    if entry is None:
+        import comtypes
+        import comtypes.client
+        try:
+            entry = (comtypes.client.GetActiveObject(prog_id), False)
+        except (OSError, comtypes.COMError):
+            app = comtypes.client.CreateObject(prog_id)
+            app.Visible = False
+            entry = (app, True)
+        _office_apps[prog_id] = entry
+    return entry[0]
+
+
+def _with_office_app(prog_id: str, convert):
+    # Run convert(app) on the shared instance. A cached proxy goes stale when the user quits
+    # an attached Word/Excel, so on a COM error drop it and retry once on a fresh instance.
+    import comtypes
+    try:
+        return convert(_get_office_app(prog_id))
+    except comtypes.COMError:
+        app, started = _office_apps.pop(prog_id, (None, False))
+        if started:
+            try:
+                app.Quit()
+            except Exception:
+                pass
+        return convert(_get_office_app(prog_id))
+
+
+def _open_office_file(collection, path: str):
+    # Documents/Workbooks.Open hands back the user's own copy if the file is already open
+    # there; return (document, opened) so only a copy opened here gets closed again
+    full = os.path.normcase(os.path.abspath(path))
+    for i in range(1, collection.Count + 1):
+        item = collection.Item(i)
+        if os.path.normcase(item.FullName) == full:
+            return item, False
+    return collection.Open(full), True
+
+
+@atexit.register
+def _quit_office_apps():
+    # an instance we merely attached to belongs to the user and is left running
+    for app, started in _office_apps.values():
+        if not started:
+            continue
+        try:
+            app.Quit()
+        except Exception:
+            pass
+    _office_apps.clear()
+
+
+# Headless LibreOffice listener shared by every conversion in this process. It runs on a
+# private profile and a free port, so it neither hands off to a LibreOffice the user has open
+# nor collides with another AuditRAM process.
+_SOFFICE_TIMEOUT = 300  # seconds per one-shot --convert-to run
+_soffice_server = None
+_soffice_desktop = None
+_soffice_url = None
+_soffice_profile = None
+
+
+def _soffice_available() -> bool:
+    return shutil.which('soffice') is not None
+
+
+def _uno_available() -> bool:
+    return importlib.util.find_spec('uno') is not None
+
+
+def _soffice_profile_arg() -> str:
+    global _soffice_profile
+    if _soffice_profile is None:
+        _soffice_profile = tempfile.mkdtemp(prefix='auditram_lo_')
+    return f'-env:UserInstallation={Path(_soffice_profile).as_uri()}'
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _get_soffice_desktop():
+    # Launch soffice once, then submit every document to it over the UNO bridge
+    global _soffice_server, _soffice_desktop, _soffice_url
+    import uno
+    from com.sun.star.connection import NoConnectException
+
+    if _soffice_server is None or _soffice_server.poll() is not None:
+        _soffice_desktop = None
+        _soffice_url = f'socket,host=localhost,port={_free_port()};urp;'
+        _soffice_server = subprocess.Popen(
+            ['soffice', _soffice_profile_arg(), '--headless', f'--accept={_soffice_url}',
+             '--norestore', '--nologo', '--nodefault'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if _soffice_desktop is None:
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext('com.sun.star.bridge.UnoUrlResolver', local)
+        # the listener needs a moment to come up after launch, longer while it creates the profile
+        for _ in range(300):
+            if _soffice_server.poll() is not None:
+                raise RuntimeError('LibreOffice exited before it started listening')
+            try:
+                ctx = resolver.resolve(f'uno:{_soffice_url}StarOffice.ComponentContext')
+                break
+            except NoConnectException:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError(f'LibreOffice did not start listening on {_soffice_url}')
+        _soffice_desktop = ctx.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', ctx)
+    return _soffice_desktop
+
+
+def _soffice_convert_cli(path: str, filter_name: str) -> str:
+    # Without the uno module, convert with a one-shot soffice run into a scratch directory;
+    # --convert-to names the output after the input, so it is moved to a _tmp_pdf path
+    out_dir = tempfile.mkdtemp(prefix='auditram_')
+    try:
+        subprocess.run(
+            ['soffice', _soffice_profile_arg(), '--headless', '--norestore',
+             '--convert-to', f'pdf:{filter_name}', '--outdir', out_dir, os.path.abspath(path)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=_SOFFICE_TIMEOUT, check=True)
+        converted = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + '.pdf')
+        if not os.path.exists(converted):
+            raise RuntimeError('soffice --convert-to produced no PDF')
+        out_pdf = _tmp_pdf()
+        shutil.move(converted, out_pdf)
+        return out_pdf
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def _uno_prop(name: str, value):
+    import uno
+    prop = uno.createUnoStruct('com.sun.star.beans.PropertyValue')
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+@atexit.register
+def _stop_soffice():
+    global _soffice_server, _soffice_desktop, _soffice_profile
+    _soffice_desktop = None
+    if _soffice_server is not None and _soffice_server.poll() is None:
+        _soffice_server.terminate()
+        try:
+            _soffice_server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _soffice_server.kill()
+    _soffice_server = None
+    if _soffice_profile is not None:
+        shutil.rmtree(_soffice_profile, ignore_errors=True)
+        _soffice_profile = None
+
+
+def _save_options(compact):
+    # compact=True adds a full garbage-collecting rewrite for the smallest file, at the cost
+    # of a slower save
+    if compact:
+        return dict(deflate=True, garbage=4, clean=True)
+    return dict(deflate=True)
+
+
+_CACHE_ROOT = Path.home() / '.cache' / 'auditram'
+
+# Annotated image outputs, keyed by (renderer, image hash, query); least recently used files
+# are pruned. Bump the render version whenever the drawn output changes.
+_IMAGE_CACHE_DIR = _CACHE_ROOT / 'images'
+_IMAGE_CACHE_SIZE = 256
+_IMAGE_RENDER_VERSION = 1
+
+
+def _image_cache_path(image_bytes: bytes, search_text: str, max_matches: Optional[int], output_path: str) -> Path:
+    image_hash = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+    query = f'{__name__}\0{_IMAGE_RENDER_VERSION}\0{search_text}\0{max_matches}'
+    query_hash = hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+    # the output format follows the output extension, so it is part of the key
+    ext = os.path.splitext(output_path)[1].lower()
+    return _IMAGE_CACHE_DIR / f'{image_hash}_{query_hash}{ext}'
+
+
+# Search results for images, persisted across runs and processes by the optional diskcache
+# package. Bump the version whenever image search (or a future OCR step) changes, so stale
+# entries are never reused.
+_RECT_CACHE_VERSION = 1
+_RECT_CACHE_EXPIRE = 30 * 24 * 3600  # seconds
+_rect_cache = None
+
+
+def _get_rect_cache():
+    global _rect_cache
+    if _rect_cache is None:
+        try:
+            import diskcache
+            _rect_cache = diskcache.Cache(str(_CACHE_ROOT))
+        except ImportError:
+            _rect_cache = False
+    return _rect_cache if _rect_cache is not False else None
+
+
+def _rect_cache_key(image_bytes: bytes, query: str) -> str:
+    return f'v{_RECT_CACHE_VERSION}|{hashlib.sha256(image_bytes).hexdigest()}|{query}'
+
+
+def _image_cache_usable() -> bool:
+    # Cached files are copied out as-is, so only trust a private directory owned by this user
+    try:
+        _IMAGE_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = _IMAGE_CACHE_DIR.stat()
+    except OSError:
+        return False
+    if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+        return False
+    return True
+
+
+def _image_cache_load(cached: Path, output_path: str) -> bool:
+    if not _image_cache_usable() or not cached.exists():
+        return False
+    shutil.copyfile(cached, output_path)
+    os.utime(cached)  # mark as recently used
+    return True
+
+
+def _image_cache_store(cached: Path, output_path: str):
+    if not _image_cache_usable():
+        return
+    tmp = cached.with_name(f'{cached.name}.{os.getpid()}.tmp')
+    shutil.copyfile(output_path, tmp)
+    os.replace(tmp, cached)
+    entries = [p for p in _IMAGE_CACHE_DIR.iterdir() if p.suffix != '.tmp']
+    entries.sort(key=lambda p: p.stat().st_mtime)
+    for old in entries[:-_IMAGE_CACHE_SIZE]:
+        old.unlink(missing_ok=True)
+
+
+def _tmp_pdf() -> str:
+    # Intermediate PDFs are short-lived; keep them on RAM-backed /dev/shm when it is usable.
+    # Callers own the returned file and must delete it.
+    shm = '/dev/shm'
+    tmp_dir = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False, dir=tmp_dir) as f:
+        return f.name
+
+
+def _add_box(page, rect):
+    # create a rectangle annotation (stroke red, no fill)
+    annot = page.add_rect_annot(rect)
+    annot.set_colors(stroke=(1, 0, 0))
+    annot.set_border(width=1)
+    annot.update()
+    return annot
+
+
+def compile_patterns(terms) -> tuple:
+    """Compile each search term as its own case-insensitive regular expression.
+
+    Terms are compiled separately, so inline flags, group names and backreferences in one
+    term cannot clash with another. Raises re.error for an invalid term.
+    """
+    return tuple(re.compile(t.strip(), re.IGNORECASE) for t in terms)
+
+
+def _regex_rects(page, *patterns):
+    # Scan the page's characters in reading order with each compiled pattern and box every
+    # match, one rect per line it touches (like search_for). Lines are joined by a space.
+    chars = []
+    for block in page.get_text('rawdict')['blocks']:
+        for line in block.get('lines', ()):
+            for span in line['spans']:
+                chars.extend(span['chars'])
+            chars.append(None)
+    text = ''.join(' ' if c is None else c['c'] for c in chars)
+
+    rects = []
+    for m in (m for pattern in patterns for m in pattern.finditer(text)):
+        box = None
+        for c in chars[m.start():m.end()]:
+            if c is None:
+                if box is not None:
+                    rects.append(box)
+                box = None
+            else:
+                box = fitz.Rect(c['bbox']) if box is None else box | c['bbox']
+        if box is not None:
+            rects.append(box)
+    return rects
+
+
+def _search_terms(page, terms, flags, textpage=None):
+    # One TextPage serves every term; search_for would otherwise rebuild it on each call
+    if textpage is None:
+        textpage = page.get_textpage(flags=flags)
+    matches = []
+    for term in terms:
+        matches.extend(page.search_for(term, textpage=textpage))
+    return matches
+
+
+def _search_key(doc, terms, patterns=None):
+    # search cache key of a document opened from a file
+    path = os.path.abspath(doc.name)
+    query = (('re',) + tuple(p.pattern for p in patterns) if patterns is not None
+             else tuple(_normalize(t) for t in terms))
+    return (path, os.path.getmtime(path), query)
+
+
+def _search_doc(doc, terms, start: int, end: int, limit=None, patterns=None):
+    # (page_index, rects) for pages [start, end) of a document opened from a file;
+    # with compiled patterns, pages are matched as regular expressions instead
+    queries = tuple(_normalize(t) for t in terms)
+    flags = _search_flags(''.join(terms))
+    cached = _search_cache_pages(_search_key(doc, terms, patterns))
+    hits = []
+    found = 0
+    for i in range(start, end):
+        rects = cached.get(i)
+        if rects is None:
+            page = doc[i]
+            if patterns is not None:
+                matches = _regex_rects(page, *patterns)
+            else:
+                # The page's TextPage is built once: its plain text tells which terms occur
+                # at all, and only those are passed to search_for, reusing the same TextPage.
+                tp = page.get_textpage(flags=flags)
+                text = _normalize(tp.extractText())
+                present = [t for t, q in zip(terms, queries) if q in text]
+                matches = _search_terms(page, present, flags, tp) if present else []
+                del tp  # free the C-level buffers before the next page
+            rects = cached[i] = tuple(tuple(r) for r in _dedup_rects(matches))
+        hits.append((i, [fitz.Rect(*r) for r in rects]))
+        found += len(rects)
+        if limit is not None and found >= limit:
+            break
+    return hits
+
+
+def _search_page_range(pdf_path: str, terms, start: int, end: int, patterns=None):
+    # Runs in a worker process, which opens its own handle on the file; plain tuples are
+    # cheaper to send back than fitz.Rect objects
+    doc = fitz.open(pdf_path)
+    try:
+        return [(pno, tuple(tuple(r) for r in rects))
+                for pno, rects in _search_doc(doc, terms, start, end, patterns=patterns)]
+    finally:
+        doc.close()
+
+
+def _page_ranges(page_count: int, n: int):
+    # split [0, page_count) into at most n contiguous (start, end) ranges
+    step = -(-page_count // n)  # ceil division
+    return [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
 
 
 class AuditRAM:
-    def __init__(self, input_path: str, search_text: str):
+    # PDFs with more pages than this are searched by worker processes
+    MP_PAGE_THRESHOLD = 200
+
+    def __init__(self, input_path: str, search_text: Union[str, List[str]], regex: bool = False):
         self.input_path = input_path
-        self.search_text = search_text
+        # one term or a list of terms (e.g. an audit keyword list), all searched in one pass
+        if isinstance(search_text, str):
+            search_text = [search_text]
+        # search_for is case-insensitive, so only surrounding whitespace is normalized
+        self.terms = tuple(t.strip() for t in search_text)
+        # regex=True treats each term as a case-insensitive regular expression, compiled once
+        self._patterns = compile_patterns(self.terms) if regex else None
         self.ext = os.path.splitext(input_path)[1].lower()
 
-    def run(self, output_path: str):
+    def run(self, output_path: str, max_matches: Optional[int] = None, compact: bool = False):
+        # max_matches stops the search once that many matches are found (None = all);
+        # compact rewrites the whole output PDF for minimum size at the cost of a slower save
+        if max_matches is not None and max_matches < 1:
+            raise ValueError(f"max_matches must be at least 1, got {max_matches}")
         if self.ext == ".pdf":
-            self._annotate_pdf(self.input_path, output_path)
+            self._annotate_pdf(self.input_path, output_path, max_matches, compact)
         elif self.ext in ('.png', '.jpg', '.jpeg'):
-            self._annotate_image(self.input_path, output_path)
-        elif self.ext == '.docx':
-            pdf = self._convert_docx_to_pdf(self.input_path)
-            self._annotate_pdf(pdf, output_path)
-        elif self.ext == '.xlsx':
-            pdf = self._convert_xlsx_to_pdf(self.input_path)
-            self._annotate_pdf(pdf, output_path)
+            self._annotate_image(self.input_path, output_path, max_matches)
+        elif self.ext in ('.docx', '.xlsx'):
+            if self.ext == '.docx':
+                pdf = self._convert_docx_to_pdf(self.input_path)
+            else:
+                pdf = self._convert_xlsx_to_pdf(self.input_path)
+            try:
+                self._annotate_pdf(pdf, output_path, max_matches, compact)
+            finally:
+                os.unlink(pdf)
         else:
             raise ValueError(f"Unsupported file extension: {self.ext}")
 
     # ---------------- PDF annotation ----------------
-    def _annotate_pdf(self, pdf_path: str, output_pdf: str):
+    def _search_pdf(self, doc, max_matches: Optional[int] = None):
+        """Return (page_index, rects) in page order for a document opened from a file.
+
+        Pages are searched one after another: PyMuPDF is not thread-safe and holds
+        the GIL, so threads add overhead without any speedup. With max_matches set,
+        only the first max_matches hits are returned and the search stops there.
+        """
+        # Large documents without a match quota scale better across processes
+        if max_matches is None and doc.page_count > self.MP_PAGE_THRESHOLD:
+            self._search_pdf_mp(doc)
+        results = []
+        remaining = max_matches
+        for pno, matches in _search_doc(doc, self.terms, 0, doc.page_count, max_matches, self._patterns):
+            if remaining is not None:
+                matches = matches[:remaining]
+                remaining -= len(matches)
+            results.append((pno, matches))
+        return results
+
+    def _annotate_pdf(self, pdf_path: str, output_pdf: str, max_matches: Optional[int] = None,
+                      compact: bool = False):
         doc = fitz.open(pdf_path)
-        # search and annotate
-        for page in doc:
-            # search_for supports string; PyMuPDF coordinates are points
-            matches = page.search_for(self.search_text, hit_max=4096)
+        # stage 1: search; PyMuPDF coordinates are points
+        results = self._search_pdf(doc, max_matches)
+        # stage 2: annotate only the pages that have matches
+        for pno, matches in results:
+            if not matches:
+                continue
+            page = doc[pno]
             for r in matches:
-                # create a rectangle annotation (stroke red, no fill)
-                annot = page.add_rect_annot(r)
-                annot.set_colors(stroke=(1, 0, 0))
-                annot.set_border(width=1)
-                annot.update()
-        doc.save(output_pdf, deflate=True)
+                _add_box(page, r)
+        doc.save(output_pdf, **_save_options(compact))
         doc.close()
 
+    def annotate_pdf_to(self, doc, output_path: str, max_matches: Optional[int] = None,
+                        compact: bool = False):
+        """Search an already-open PDF document and save an annotated copy to output_path.
+
+        The search runs on doc (and its cached results), but the boxes go on a fresh copy
+        opened from doc.name, so doc stays unchanged and can be searched again.
+        """
+        results = self._search_pdf(doc, max_matches)
+        out = fitz.open(doc.name)
+        try:
+            for pno, matches in results:
+                if not matches:
+                    continue
+                page = out[pno]
+                for r in matches:
+                    _add_box(page, r)
+            out.save(output_path, **_save_options(compact))
+        finally:
+            out.close()
+
+    def _search_pdf_mp(self, doc, n_workers: Optional[int] = None):
+        """Search a PDF in worker processes, one page range each, filling the search cache.
+
+        Only (page_index, rects) come back from the workers; the caller then reads them
+        from the cache and annotates its own document, so links, forms and other
+        document-level data are kept.
+        """
+        page_count = doc.page_count
+        n_workers = max(1, min(n_workers or os.cpu_count() or 1, page_count))
+        cached = _search_cache_pages(_search_key(doc, self.terms, self._patterns))
+        if n_workers == 1 or len(cached) == page_count:
+            return
+        with ProcessPoolExecutor(max_workers=n_workers) as ex:
+            futures = [ex.submit(_search_page_range, doc.name, self.terms, start, end, self._patterns)
+                       for start, end in _page_ranges(page_count, n_workers)]
+            for future in futures:
+                cached.update(future.result())  # re-raises worker errors
+
     # ---------------- Image annotation ----------------
-    def _annotate_image(self, img_path: str, output_path: str):
-        # Strategy: convert image to a single-page PDF, use PyMuPDF to search (OCR not included)
+    def _annotate_image(self, img_path: str, output_path: str, max_matches: Optional[int] = None):
+        # Strategy: place the image on a single in-memory PDF page, use PyMuPDF to search (OCR not included)
         # If image contains embedded text (vector text), search may work. Otherwise, users should
         # run OCR externally (e.g., Tesseract) and provide coordinates or a PDF with selectable text.
-        img = Image.open(img_path)
-        temp_pdf = tempfile.mktemp(suffix='.pdf')
-        img.save(temp_pdf, 'PDF')
-
-        # Annotate PDF then render back to image
-        annotated_pdf = tempfile.mktemp(suffix='.pdf')
-        self._annotate_pdf(temp_pdf, annotated_pdf)
-
-        # Render first page of annotated PDF back to image
-        doc = fitz.open(annotated_pdf)
-        pix = doc[0].get_pixmap()
-        pix.save(output_path)
+        with open(img_path, 'rb') as f:
+            image_bytes = f.read()
+        query = '\0'.join(self.terms) + ('\0re' if self._patterns is not None else '')
+        cached = _image_cache_path(image_bytes, query, max_matches, output_path)
+        if _image_cache_load(cached, output_path):
+            return
+
+        try:
+            pix = fitz.Pixmap(img_path)
+        except Exception as e:
+            # newer PyMuPDF raises its own mupdf.FzError* types rather than RuntimeError
+            raise RuntimeError(f'Cannot read image {img_path}: {e}') from e
+        doc = fitz.open()
+        page = doc.new_page(width=pix.width, height=pix.height)
+        page.insert_image(page.rect, pixmap=pix)
+
+        # The full (unlimited) result list is cached so any max_matches can be served from it
+        rect_cache = _get_rect_cache()
+        key = _rect_cache_key(image_bytes, query)
+        rects = rect_cache.get(key) if rect_cache is not None else None
+        if rects is None:
+            if self._patterns is not None:
+                matches = _regex_rects(page, *self._patterns)
+            else:
+                matches = _search_terms(page, self.terms, _search_flags(''.join(self.terms)))
+            rects = [tuple(r) for r in _dedup_rects(matches)]
+            if rect_cache is not None:
+                rect_cache.set(key, rects, expire=_RECT_CACHE_EXPIRE)
+        for r in rects[:max_matches]:
+            _add_box(page, fitz.Rect(r))
+
+        # Render the annotated page back to image
+        page.get_pixmap().save(output_path)
         doc.close()
+        _image_cache_store(cached, output_path)
 
     # ----------------- DOCX/XLSX conversion helpers -----------------
+    def _convert_via_soffice(self, path: str, filter_name: str) -> str:
+        """Convert an Office file to a temporary PDF using headless LibreOffice.
+
+        The shared listener is used when LibreOffice's `uno` module is importable from this
+        interpreter; otherwise each file goes through a one-shot `soffice --convert-to pdf`.
+        """
+        if not _uno_available():
+            return _soffice_convert_cli(path, filter_name)
+        import uno
+        desktop = _get_soffice_desktop()
+        out_pdf = _tmp_pdf()
+        try:
+            doc = desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(path)), '_blank', 0, (_uno_prop('Hidden', True),))
+            try:
+                doc.storeToURL(uno.systemPathToFileUrl(out_pdf), (_uno_prop('FilterName', filter_name),))
+            finally:
+                doc.close(True)
+        except Exception:
+            os.unlink(out_pdf)
+            raise
+        return out_pdf
+
     def _convert_docx_to_pdf(self, docx_path: str) -> str:
-        # Requires MS Word COM (Windows) or another converter. We try COM and otherwise raise.
+        # Prefer LibreOffice (any OS); otherwise MS Word COM (Windows). We try COM and otherwise raise.
+        if _soffice_available():
+            try:
+                return self._convert_via_soffice(docx_path, 'writer_pdf_Export')
+            except Exception as e:
+                raise RuntimeError('DOCX->PDF conversion via LibreOffice failed. ' + str(e))
+        out_pdf = _tmp_pdf()
+
+        def convert(word):
+            doc, opened = _open_office_file(word.Documents, docx_path)
+            try:
+                # export rather than SaveAs, which would rebind a user's open document
+                wdExportFormatPDF = 17
+                doc.ExportAsFixedFormat(out_pdf, wdExportFormatPDF)
+            finally:
+                if opened:
+                    doc.Close(False)
+
         try:
-            import comtypes.client
-            word = comtypes.client.CreateObject('Word.Application')
-            word.Visible = False
-            doc = word.Documents.Open(docx_path)
-            out_pdf = tempfile.mktemp(suffix='.pdf')
-            wdFormatPDF = 17
-            doc.SaveAs(out_pdf, FileFormat=wdFormatPDF)
-            doc.Close()
-            word.Quit()
+            _with_office_app('Word.Application', convert)
             return out_pdf
         except Exception as e:
-            raise RuntimeError('DOCX->PDF conversion failed. Requires MS Word on Windows. ' + str(e))
+            os.unlink(out_pdf)
+            raise RuntimeError('DOCX->PDF conversion failed. Requires LibreOffice or MS Word on Windows. ' + str(e))
 
     def _convert_xlsx_to_pdf(self, xlsx_path: str) -> str:
+        if _soffice_available():
+            try:
+                return self._convert_via_soffice(xlsx_path, 'calc_pdf_Export')
+            except Exception as e:
+                raise RuntimeError('XLSX->PDF conversion via LibreOffice failed. ' + str(e))
+        out_pdf = _tmp_pdf()
+
+        def convert(excel):
+            wb, opened = _open_office_file(excel.Workbooks, xlsx_path)
+            try:
+                # 0 = PDF format in ExportAsFixedFormat
+                wb.ExportAsFixedFormat(0, out_pdf)
+            finally:
+                if opened:
+                    wb.Close(False)
+
         try:
-            import comtypes.client
-            excel = comtypes.client.CreateObject('Excel.Application')
-            excel.Visible = False
-            wb = excel.Workbooks.Open(xlsx_path)
-            out_pdf = tempfile.mktemp(suffix='.pdf')
-            # 0 = PDF format in ExportAsFixedFormat
-            wb.ExportAsFixedFormat(0, out_pdf)
-            wb.Close()
-            excel.Quit()
+            _with_office_app('Excel.Application', convert)
             return out_pdf
         except Exception as e:
-            raise RuntimeError('XLSX->PDF conversion failed. Requires MS Excel on Windows. ' + str(e))
+            os.unlink(out_pdf)
+            raise RuntimeError('XLSX->PDF conversion failed. Requires LibreOffice or MS Excel on Windows. ' + str(e))
 ```
 
 ---
@@ -128,19 +705,72 @@ class AuditRAM:
 ```python
 """Simple CLI wrapper for AuditRAM"""
 import argparse
-from auditram import AuditRAM
+import os
+import re
+import sys
+from auditram import AuditRAM, compile_patterns
+
+
+def output_name(input_path):
+    # Images stay images; everything else is annotated as PDF
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    if ext.lower() not in ('.png', '.jpg', '.jpeg'):
+        ext = '.pdf'
+    return f'{stem}_annotated{ext}'
 
 
 def main():
     parser = argparse.ArgumentParser(description='AuditRAM highlighter')
-    parser.add_argument('input', help='Input file path (pdf/docx/xlsx/png/jpg)')
+    parser.add_argument('inputs', nargs='+', help='Input file paths (pdf/docx/xlsx/png/jpg)')
     parser.add_argument('text', help='Text to search for (case-insensitive)')
-    parser.add_argument('-o', '--output', help='Output file path', default='output_annotated.pdf')
+    parser.add_argument('-a', '--also', action='append', default=[], metavar='TEXT',
+                        help='Additional text to search for in the same pass (repeatable)')
+    parser.add_argument('-o', '--output', help='Output directory', default='.')
+    parser.add_argument('-n', '--max-matches', type=int, default=None,
+                        help='Stop after this many matches (default: all)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Fully rewrite output PDFs for minimum size (slower)')
+    parser.add_argument('--regex', action='store_true',
+                        help='Treat text as a case-insensitive regular expression')
 
     args = parser.parse_args()
-    tool = AuditRAM(args.input, args.text)
-    tool.run(args.output)
-    print('Annotated output written to', args.output)
+    if args.max_matches is not None and args.max_matches < 1:
+        parser.error('-n/--max-matches must be at least 1')
+    terms = [args.text, *args.also]
+    if args.regex:
+        # validate exactly what AuditRAM will compile
+        try:
+            compile_patterns(terms)
+        except re.error as e:
+            parser.error(f'invalid regular expression {e.pattern!r}: {e}')
+    # Output names drop the directory and, for converted files, the extension, so
+    # d1/r.pdf and d2/r.pdf (or r.docx and r.pdf) would overwrite each other, and an output
+    # can land on another input (r.pdf next to r_annotated.pdf)
+    inputs = {os.path.normcase(os.path.realpath(path)) for path in args.inputs}
+    outputs = {}
+    for path in args.inputs:
+        out = os.path.join(args.output, output_name(path))
+        key = os.path.normcase(os.path.realpath(out))
+        if key in inputs:
+            parser.error(f'{path} would be written to {out}, which is also an input')
+        other = outputs.setdefault(key, path)
+        if other != path:
+            parser.error(f'{other} and {path} would both be written to {out}; annotate them in separate runs')
+    os.makedirs(args.output, exist_ok=True)
+
+    # All files share this process, so Word/Excel are started at most once per batch
+    failed = False
+    for path in args.inputs:
+        out = os.path.join(args.output, output_name(path))
+        try:
+            tool = AuditRAM(path, terms, regex=args.regex)
+            tool.run(out, max_matches=args.max_matches, compact=args.compact)
+        except (ValueError, RuntimeError, OSError) as e:
+            print(f'{path}: {e}', file=sys.stderr)
+            failed = True
+            continue
+        print('Annotated output written to', out)
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == '__main__':
@@ -155,8 +785,63 @@ if __name__ == '__main__':
 """Tkinter GUI to select file, enter text and run annotation"""
 import tkinter as tk
 from tkinter import filedialog, messagebox
+import os
+from concurrent.futures import ThreadPoolExecutor
+import fitz  # PyMuPDF
 from auditram import AuditRAM
 
+DEBOUNCE_MS = 300
+POLL_MS = 50
+
+_inflight = False
+_pending_run = None  # Tk after() id of the scheduled run
+# Open PDFs reused across searches, keyed by (path, mtime); only used on the worker thread
+_open_docs = {}
+
+
+def _init_worker():
+    # Office COM must be initialised on the thread that uses it (Windows only)
+    try:
+        import comtypes
+        comtypes.CoInitialize()
+    except ImportError:
+        pass
+
+
+# One long-lived worker keeps the shared Word/Excel instances on a single COM thread
+_worker = ThreadPoolExecutor(max_workers=1, initializer=_init_worker)
+
+
+def _get_doc(path):
+    key = (os.path.abspath(path), os.path.getmtime(path))
+    doc = _open_docs.get(key)
+    if doc is None:
+        # a different file, or the same one changed on disk: drop the old handle
+        _close_all_docs()
+        doc = _open_docs[key] = fitz.open(path)
+    return doc
+
+
+def _close_all_docs():
+    for doc in _open_docs.values():
+        doc.close()
+    _open_docs.clear()
+
+
+def _annotate(infile, text, outfile):
+    tool = AuditRAM(infile, text)
+    if tool.ext == '.pdf':
+        # search the already-open PDF; only the annotated copy is opened per run
+        tool.annotate_pdf_to(_get_doc(infile), outfile)
+    else:
+        tool.run(outfile)
+
+
+def close_app(root):
+    # queued behind any running job so the documents are closed on the worker thread
+    _worker.submit(_close_all_docs)
+    root.destroy()
+
 
 def browse_file(entry):
     path = filedialog.askopenfilename()
@@ -165,16 +850,45 @@ def browse_file(entry):
         entry.insert(0, path)
 
 
-def run_annotation(file_entry, text_entry, output_entry):
+def request_run(root, run_button, file_entry, text_entry, output_entry):
+    # Trailing-edge debounce: repeated clicks collapse into one run DEBOUNCE_MS after the last
+    global _pending_run
+    if _inflight:
+        return
+    if _pending_run is not None:
+        root.after_cancel(_pending_run)
+    _pending_run = root.after(
+        DEBOUNCE_MS, lambda: run_annotation(root, run_button, file_entry, text_entry, output_entry))
+
+
+def run_annotation(root, run_button, file_entry, text_entry, output_entry):
+    global _inflight, _pending_run
+    _pending_run = None
+    if _inflight:
+        return
     infile = file_entry.get()
     text = text_entry.get()
     outfile = output_entry.get() or 'output_annotated.pdf'
-    try:
-        tool = AuditRAM(infile, text)
-        tool.run(outfile)
-        messagebox.showinfo('Done', f'Annotated file created: {outfile}')
-    except Exception as e:
-        messagebox.showerror('Error', str(e))
+
+    # Run off the Tk thread so the window stays responsive; the button stays disabled until done
+    _inflight = True
+    run_button.config(state=tk.DISABLED)
+    future = _worker.submit(_annotate, infile, text, outfile)
+
+    def poll():
+        global _inflight
+        if not future.done():
+            root.after(POLL_MS, poll)
+            return
+        _inflight = False
+        run_button.config(state=tk.NORMAL)
+        try:
+            future.result()
+            messagebox.showinfo('Done', f'Annotated file created: {outfile}')
+        except Exception as e:
+            messagebox.showerror('Error', str(e))
+
+    root.after(POLL_MS, poll)
 
 
 def build_app():
@@ -194,8 +908,11 @@ def build_app():
     out_entry.grid(row=2, column=1)
     out_entry.insert(0, 'output_annotated.pdf')
 
-    tk.Button(root, text='Run', command=lambda: run_annotation(file_entry, text_entry, out_entry)).grid(row=3, column=1)
+    run_button = tk.Button(root, text='Run')
+    run_button.config(command=lambda: request_run(root, run_button, file_entry, text_entry, out_entry))
+    run_button.grid(row=3, column=1)
 
+    root.protocol('WM_DELETE_WINDOW', lambda: close_app(root))
     root.mainloop()
 
 
@@ -209,10 +926,8 @@ if __name__ == '__main__':
 
 ```
 PyMuPDF>=1.23.0
-Pillow>=9.0.0
-python-docx>=0.8.11
-openpyxl>=3.0.0
 comtypes>=1.1.10  # Only needed on Windows for Office COM automation
+diskcache>=5.0  # Optional: persistent search-result cache for images
 ```
 
 ---
@@ -227,13 +942,13 @@ A Python tool to search for a text string inside PDF, Word, Excel and Images and
 ## Features
 - PDF: search and annotate (PyMuPDF)
 - Image (PNG/JPG): convert to one-page PDF, annotate and render back to image
-- DOCX / XLSX: convert to PDF via MS Office (Windows) then annotate
+- DOCX / XLSX: convert to PDF via LibreOffice or MS Office (Windows) then annotate
 - Does **not** modify the original file — writes annotated copies
 
 ## Requirements
 - Python 3.9+
 - See `requirements.txt`
-- **Windows-only** for DOCX/XLSX conversion using MS Word/Excel COM. If you need cross-platform conversion, consider LibreOffice `soffice --convert-to pdf`.
+- DOCX/XLSX conversion uses LibreOffice when `soffice` is on PATH (any OS). If its Python `uno` module is importable, a single headless `soffice` listener is started on first use and shut down on exit; otherwise each file is converted with `soffice --headless --convert-to pdf`. Both run on a private temporary profile, so a LibreOffice window you already have open is left alone. Without LibreOffice it falls back to MS Word/Excel COM, which is **Windows-only**.
 
 ## Install
 ```bash
@@ -245,9 +960,15 @@ pip install -r requirements.txt
 ## Usage (CLI)
 
 ```bash
-python cli.py "/path/to/input.pdf" "search phrase" -o annotated.pdf
+python cli.py "/path/to/input.pdf" "/path/to/report.docx" "search phrase" -o annotated/
 ```
 
+Several inputs can be given at once; each is written to the output directory as `<name>_annotated.pdf` (images keep their format). Inputs that would share an output name are rejected before anything is written. Word/Excel are started only once per batch.
+
+Pass `--regex` to treat the search text as a case-insensitive regular expression, e.g. `"invoice\s+#?\d+"`.
+
+Use `-a TEXT` (repeatable) to look for several terms in one pass, e.g. `"invoice" -a "GSTIN" -a "total"`.
+
 ## Usage (GUI)
 
 ```bash
@@ -277,11 +998,87 @@ Replace paths as needed.
 ```bash
 #!/bin/sh
 # Sample run using the instruction sheet uploaded by the user
-python3 cli.py "/mnt/data/Instruction Sheet_AuditRAM.pdf" "text" -o test_output.pdf
+python3 cli.py "/mnt/data/Instruction Sheet_AuditRAM.pdf" "text" -o test_output
 ````
 
 ---
 
+## tests/test_auditram.py
+
+```python
+"""Unit tests for the rect helpers, built on in-memory PyMuPDF documents.
+
+Run from the repository root with `python -m pytest`.
+"""
+import re
+
+import fitz  # PyMuPDF
+
+from auditram import _dedup_rects, _regex_rects, compile_patterns
+
+
+def _page(*lines):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), list(lines))
+    return doc, page
+
+
+def test_dedup_drops_exact_duplicates():
+    doc, page = _page('invoice total', 'invoice due')
+    hits = page.search_for('invoice')
+    assert len(hits) == 2
+    assert _dedup_rects(hits + [fitz.Rect(r) for r in hits]) == hits
+
+
+def test_dedup_drops_near_duplicates_above_iou_threshold():
+    r = fitz.Rect(10, 10, 110, 30)
+    near = fitz.Rect(10.5, 10, 110.5, 30)  # IoU ~0.99
+    assert _dedup_rects([r, near]) == [r]
+
+
+def test_dedup_drops_tall_near_duplicates_a_few_rows_apart():
+    r = fitz.Rect(10, 10, 110, 50)
+    near = fitz.Rect(10, 12.1, 110, 52.1)  # IoU ~0.9002, tops two rows apart
+    assert _dedup_rects([r, near]) == [r]
+
+
+def test_dedup_keeps_partial_overlaps():
+    r = fitz.Rect(10, 10, 110, 30)
+    shifted = fitz.Rect(30, 10, 130, 30)  # IoU ~0.67
+    assert _dedup_rects([r, shifted]) == [r, shifted]
+
+
+def test_regex_match_on_one_line():
+    doc, page = _page('invoice #4711 total')
+    rects = _regex_rects(page, re.compile(r'invoice\s+#?\d+', re.IGNORECASE))
+    assert len(rects) == 1
+    assert rects[0] == page.search_for('invoice #4711')[0]
+
+
+def test_regex_match_wrapping_a_line_gets_one_rect_per_line():
+    doc, page = _page('invoice total', 'amount due')
+    first, second = _regex_rects(page, re.compile(r'total\s+amount'))
+    assert first == page.search_for('total')[0]
+    assert second == page.search_for('amount')[0]
+    assert first.y1 <= second.y0
+
+
+def test_regex_terms_are_compiled_separately():
+    doc, page = _page('invoice total', 'amount due')
+    # inline flags and a group name reused across terms would break one combined pattern
+    patterns = compile_patterns(['(?i)INVOICE', '(?P<w>total)', '(?P<w>due)'])
+    rects = _regex_rects(page, *patterns)
+    assert rects == [page.search_for(t)[0] for t in ('invoice', 'total', 'due')]
+
+
+def test_regex_zero_length_matches_are_ignored():
+    doc, page = _page('invoice total')
+    assert _regex_rects(page, re.compile(r'x*')) == []
+```
+
+---
+
 ## .gitignore
 
 ```
@@ -1,34 +1,227 @@
 import os
+import math
+import atexit
+import hashlib
+import shutil
 import fitz  # PyMuPDF for PDF + images
-import docx
-from openpyxl import load_workbook
-from PIL import Image
-from PIL import ImageDraw
 import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+
+_SEARCH_CACHE_DOCS = 16
+# (pdf_path, mtime, normalized search terms) -> {page_index: tuple of rect tuples}, oldest first
+_SEARCH_CACHE = OrderedDict()
+
+
+def _search_cache_pages(key):
+    # Whole documents are evicted, so a scan of a long PDF never pushes out its own pages
+    pages = _SEARCH_CACHE.get(key)
+    if pages is None:
+        pages = _SEARCH_CACHE[key] = {}
+        while len(_SEARCH_CACHE) > _SEARCH_CACHE_DOCS:
+            _SEARCH_CACHE.popitem(last=False)
+    else:
+        _SEARCH_CACHE.move_to_end(key)
+    return pages
+
+
+def _iou(a, b):
+    inter = a & b
+    if inter.is_empty:
+        return 0.0
+    overlap = inter.get_area()
+    return overlap / (a.get_area() + b.get_area() - overlap)
+
+
+def _dedup_rects(rects):
+    # search_for can report a hit twice (line breaks, dehyphenation); drop exact repeats and
+    # boxes overlapping a kept one by IoU > 0.9. That needs tops closer than height / 9,
+    # so only rows in that window are compared.
+    kept = []
+    seen = set()
+    rows = {}
+    for r in rects:
+        key = (round(r.x0, 1), round(r.y0, 1), round(r.x1, 1), round(r.y1, 1))
+        if key in seen:
+            continue
+        reach = r.height / 9
+        near = range(math.floor(r.y0 - reach), math.floor(r.y0 + reach) + 1)
+        if any(_iou(r, kept[j]) > 0.9 for y in near for j in rows.get(y, ())):
+            continue
+        seen.add(key)
+        rows.setdefault(math.floor(r.y0), []).append(len(kept))
+        kept.append(r)
+    return kept
+
+
+# Annotated image outputs, keyed by (renderer, image hash, query); least recently used files
+# are pruned. The renderer names this class, so outputs of other modules sharing the
+# directory are never reused; bump the version whenever the drawn boxes change.
+_IMAGE_CACHE_DIR = Path.home() / '.cache' / 'auditram' / 'images'
+_IMAGE_CACHE_SIZE = 256
+_IMAGE_RENDERER = f'{__name__}.AuditRAMHighlighter/1'
+
+
+def _image_cache_path(image_bytes, query, max_matches, output_path):
+    image_hash = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+    key = f'{_IMAGE_RENDERER}\0{query}\0{max_matches}'.encode()
+    query_hash = hashlib.blake2b(key, digest_size=8).hexdigest()
+    # the output format follows the output extension
+    ext = os.path.splitext(output_path)[1].lower()
+    return _IMAGE_CACHE_DIR / f'{image_hash}_{query_hash}{ext}'
+
+
+def _image_cache_usable():
+    # Cached files are copied out as-is: only trust a private directory owned by this user
+    try:
+        _IMAGE_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        st = _IMAGE_CACHE_DIR.stat()
+    except OSError:
+        return False
+    return not hasattr(os, 'getuid') or (st.st_uid == os.getuid() and not st.st_mode & 0o077)
+
+
+def _image_cache_load(cached, output_path):
+    if not _image_cache_usable() or not cached.exists():
+        return False
+    shutil.copyfile(cached, output_path)
+    os.utime(cached)  # mark as recently used
+    return True
+
+
+def _image_cache_store(cached, output_path):
+    if not _image_cache_usable():
+        return
+    tmp = cached.with_name(f'{cached.name}.{os.getpid()}.tmp')
+    shutil.copyfile(output_path, tmp)
+    os.replace(tmp, cached)
+    entries = sorted((p for p in _IMAGE_CACHE_DIR.iterdir() if p.suffix != '.tmp'),
+                     key=lambda p: p.stat().st_mtime)
+    for old in entries[:-_IMAGE_CACHE_SIZE]:
+        old.unlink(missing_ok=True)
+
+
+# Image search results, persisted across runs and processes by the optional diskcache
+# package. Bump the version whenever image search (or a future OCR step) changes.
+_RECT_CACHE_VERSION = 1
+_RECT_CACHE_EXPIRE = 30 * 24 * 3600  # seconds
+_rect_cache = None
+
+
+def _get_rect_cache():
+    global _rect_cache
+    if _rect_cache is None:
+        try:
+            import diskcache
+            _rect_cache = diskcache.Cache(str(Path.home() / '.cache' / 'auditram'))
+        except ImportError:
+            _rect_cache = False
+    return _rect_cache if _rect_cache is not False else None
+
+
+def _rect_cache_key(image_bytes, query):
+    image_hash = hashlib.sha256(image_bytes).hexdigest()
+    return f'{__name__}.AuditRAMHighlighter|v{_RECT_CACHE_VERSION}|{image_hash}|{query}'
+
+
+def _tmp_pdf():
+    # Intermediate PDFs are short-lived; keep them on RAM-backed /dev/shm when it is usable.
+    # Callers own the returned file and must delete it.
+    shm = '/dev/shm'
+    tmp_dir = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False, dir=tmp_dir) as f:
+        return f.name
+
+
+# Word/Excel COM instances reused across files, keyed by ProgID
+_office_apps = {}
+
+
+def _get_office_app(prog_id):
+    # Launching Office takes seconds: attach to an instance that is already running if there
+    # is one, otherwise start it once and quit it at interpreter exit
+    entry = _office_apps.get(prog_id)
+    if entry is None:
+        import comtypes
+        import comtypes.client
+        try:
+            entry = (comtypes.client.GetActiveObject(prog_id), False)
+        except (OSError, comtypes.COMError):
+            entry = (comtypes.client.CreateObject(prog_id), True)
+        _office_apps[prog_id] = entry
+    return entry[0]
+
+
+def _quit_office_app(app, started):
+    # an instance we attached to belongs to the user and is left running
+    if started:
+        try:
+            app.Quit()
+        except Exception:
+            pass
+
+
+def _with_office_app(prog_id, convert):
+    # The cached proxy goes stale if the user quits an attached Word/Excel: on a COM error,
+    # drop it and retry once on a fresh instance
+    import comtypes
+    try:
+        return convert(_get_office_app(prog_id))
+    except comtypes.COMError:
+        _quit_office_app(*_office_apps.pop(prog_id, (None, False)))
+        return convert(_get_office_app(prog_id))
+
+
+def _open_office_file(collection, path):
+    # Documents/Workbooks.Open returns the user's own copy when the file is already open,
+    # so report whether it was opened here and only close it in that case
+    full = os.path.normcase(os.path.abspath(path))
+    for i in range(1, collection.Count + 1):
+        item = collection.Item(i)
+        if os.path.normcase(item.FullName) == full:
+            return item, False
+    return collection.Open(full), True
+
+
+@atexit.register
+def _quit_office_apps():
+    for app, started in _office_apps.values():
+        _quit_office_app(app, started)
+    _office_apps.clear()
 
 
 class AuditRAMHighlighter:
 
     def __init__(self, file_path, search_text):
         self.file_path = file_path
-        self.search_text = search_text.lower().strip()
+        # search_text may be a single term or a list of terms searched in the same pass;
+        # search_for is case-insensitive, so only surrounding whitespace is normalized
+        if isinstance(search_text, str):
+            search_text = [search_text]
+        self.terms = tuple(t.strip() for t in search_text)
         self.ext = os.path.splitext(file_path)[1].lower()
 
     # ------------------------------------------------------
     # --------- MAIN EXECUTION FUNCTION --------------------
     # ------------------------------------------------------
-    def run(self, output_path):
+    def run(self, output_path, max_matches=None, compact=False):
+        # max_matches: stop searching once this many matches are found (None = all)
+        # compact: fully rewrite the output PDF for minimum size (slower save)
+        if max_matches is not None and max_matches < 1:
+            raise ValueError("max_matches must be at least 1.")
+
         if self.ext == ".pdf":
-            self._process_pdf(output_path)
+            self._process_pdf(output_path, max_matches, compact)
 
         elif self.ext in [".png", ".jpg", ".jpeg"]:
-            self._process_image(output_path)
+            self._process_image(output_path, max_matches)
 
         elif self.ext == ".docx":
-            self._process_word(output_path)
+            self._process_word(output_path, max_matches, compact)
 
         elif self.ext == ".xlsx":
-            self._process_excel(output_path)
+            self._process_excel(output_path, max_matches, compact)
 
         else:
             raise ValueError("Unsupported file format.")
@@ -36,84 +229,158 @@ class AuditRAMHighlighter:
     # ------------------------------------------------------
     # --------- PDF PROCESSING (with PyMuPDF) --------------
     # ------------------------------------------------------
-    def _process_pdf(self, output_file):
+    def _search_flags(self):
+        # ASCII queries let MuPDF expand ligatures, the cheaper path
+        flags = fitz.TEXT_DEHYPHENATE | fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+        if not ''.join(self.terms).isascii():
+            flags |= fitz.TEXT_PRESERVE_LIGATURES
+        return flags
+
+    def _search_page(self, page, flags):
+        # Build the page's TextPage once: its plain text tells which terms occur at all,
+        # and only those go to search_for, which reuses the same TextPage
+        tp = page.get_textpage(flags=flags)
+        text = " ".join(tp.extractText().lower().split())
+        text_instances = []
+        for term in self.terms:
+            if " ".join(term.lower().split()) in text:
+                text_instances.extend(page.search_for(term, textpage=tp))
+        return _dedup_rects(text_instances)
+
+    def _process_pdf(self, output_file, max_matches=None, compact=False):
         pdf = fitz.open(self.file_path)
+        flags = self._search_flags()
+        found = 0
+
+        # Reruns on the same unchanged file reuse earlier page results
+        path = os.path.abspath(self.file_path)
+        queries = tuple(" ".join(t.lower().split()) for t in self.terms)
+        cached = _search_cache_pages((path, os.path.getmtime(path), queries))
 
         for page in pdf:
-            text_instances = page.search_for(self.search_text, hit_max=5000)
+            rects = cached.get(page.number)
+            if rects is None:
+                rects = cached[page.number] = tuple(tuple(r) for r in self._search_page(page, flags))
+            text_instances = [fitz.Rect(r) for r in rects]
+            if max_matches is not None:
+                text_instances = text_instances[:max_matches - found]
             for inst in text_instances:
                 # Draw a red rectangle with transparent fill
-                page.add_rect_annot(inst).set_colors(stroke=(1, 0, 0))
-                page.add_rect_annot(inst).update()
+                annot = page.add_rect_annot(inst)
+                annot.set_colors(stroke=(1, 0, 0))
+                annot.set_border(width=1)
+                annot.update()
+            found += len(text_instances)
+            if max_matches is not None and found >= max_matches:
+                break
 
-        pdf.save(output_file, deflate=True)
+        if compact:
+            pdf.save(output_file, deflate=True, garbage=4, clean=True)
+        else:
+            pdf.save(output_file, deflate=True)
         pdf.close()
 
     # ------------------------------------------------------
-    # --------- IMAGE PROCESSING (PIL) ----------------------
+    # --------- IMAGE PROCESSING (PyMuPDF) ------------------
     # ------------------------------------------------------
-    def _process_image(self, output_file):
-        image = Image.open(self.file_path)
-        draw = ImageDraw.Draw(image)
+    def _process_image(self, output_file, max_matches=None):
+        with open(self.file_path, 'rb') as f:
+            image_bytes = f.read()
+
+        # Same image + same query as an earlier run: reuse its output
+        query = '\0'.join(self.terms)
+        cached = _image_cache_path(image_bytes, query, max_matches, output_file)
+        if _image_cache_load(cached, output_file):
+            return
 
-        # Convert image → temp PDF for text extraction
-        temp_pdf = tempfile.mktemp(".pdf")
-        image.save(temp_pdf, "PDF")
+        # Load image straight into a one-page in-memory PDF for text extraction
+        pix = fitz.Pixmap(self.file_path)
+        pdf = fitz.open()
+        page = pdf.new_page(width=pix.width, height=pix.height)
+        page.insert_image(page.rect, pixmap=pix)
 
-        pdf = fitz.open(temp_pdf)
-        page = pdf[0]
+        # Reuse stored search results for this image when available (they keep every match,
+        # so one entry serves any max_matches)
+        rect_cache = _get_rect_cache()
+        key = _rect_cache_key(image_bytes, query)
+        rects = rect_cache.get(key) if rect_cache is not None else None
+        if rects is None:
+            rects = [tuple(r) for r in self._search_page(page, self._search_flags())]
+            if rect_cache is not None:
+                rect_cache.set(key, rects, expire=_RECT_CACHE_EXPIRE)
 
-        text_instances = page.search_for(self.search_text)
-        for inst in text_instances:
-            x0, y0, x1, y1 = inst
-            draw.rectangle((x0, y0, x1, y1), outline="red", width=3)
+        for inst in rects[:max_matches]:
+            page.draw_rect(fitz.Rect(inst), color=(1, 0, 0), width=3)
 
-        image.save(output_file)
+        page.get_pixmap().save(output_file)
+        pdf.close()
+        _image_cache_store(cached, output_file)
 
     # ------------------------------------------------------
     # --------- WORD DOCUMENT PROCESSING (.docx) ------------
     # ------------------------------------------------------
-    def _process_word(self, output_file):
-        doc = docx.Document(self.file_path)
+    def _process_word(self, output_file, max_matches=None, compact=False):
+        # Word itself renders the document, so the COM conversion below is authoritative;
+        # there is nothing to gain from parsing the .docx in Python first.
 
         # Convert Word → temp PDF for measurement & annotation
-        temp_pdf = tempfile.mktemp(".pdf")
-
-        # Save as PDF (MS Word COM automation on Windows only)
+        temp_pdf = _tmp_pdf()
+        source = self.file_path
         try:
-            import comtypes.client
-            word = comtypes.client.CreateObject('Word.Application')
-            doc_obj = word.Documents.Open(self.file_path)
-            doc_obj.SaveAs(temp_pdf, FileFormat=17)
-            doc_obj.Close()
-            word.Quit()
-        except:
-            raise RuntimeError("Word-to-PDF conversion requires MS Word on Windows.")
-
-        # Now annotate PDF and save final
-        self.file_path = temp_pdf
-        self._process_pdf(output_file)
+            # Export as PDF (MS Word COM automation on Windows only); export rather than
+            # SaveAs, which would rebind a document the user has open to the PDF
+            def convert(word):
+                doc_obj, opened = _open_office_file(word.Documents, self.file_path)
+                try:
+                    doc_obj.ExportAsFixedFormat(temp_pdf, 17)
+                finally:
+                    if opened:
+                        doc_obj.Close(False)
+
+            try:
+                import comtypes
+                _with_office_app('Word.Application', convert)
+            except ImportError:
+                raise RuntimeError("Word-to-PDF conversion requires MS Word on Windows.") from None
+            except (OSError, AttributeError, comtypes.COMError) as e:
+                raise RuntimeError(f"Word-to-PDF conversion failed: {e}") from e
+
+            # Now annotate PDF and save final
+            self.file_path = temp_pdf
+            self._process_pdf(output_file, max_matches, compact)
+        finally:
+            self.file_path = source
+            os.unlink(temp_pdf)
 
     # ------------------------------------------------------
     # --------- EXCEL PROCESSING (.xlsx) --------------------
     # ------------------------------------------------------
-    def _process_excel(self, output_file):
+    def _process_excel(self, output_file, max_matches=None, compact=False):
+        # Excel renders the workbook itself; the COM export below is authoritative
+        result_pdf = _tmp_pdf()
+        source = self.file_path
+        try:
+            # Convert Excel → PDF (Windows + MS Excel only)
+            def convert(excel):
+                wb_obj, opened = _open_office_file(excel.Workbooks, self.file_path)
+                try:
+                    wb_obj.ExportAsFixedFormat(0, result_pdf)
+                finally:
+                    if opened:
+                        wb_obj.Close(False)
 
-        wb = load_workbook(self.file_path)
-        result_pdf = tempfile.mktemp(".pdf")
+            try:
+                import comtypes
+                _with_office_app("Excel.Application", convert)
 
-        # Convert Excel → PDF (Windows + MS Excel only)
-        try:
-            import comtypes.client
-            excel = comtypes.client.CreateObject("Excel.Application")
-            wb_obj = excel.Workbooks.Open(self.file_path)
-            wb_obj.ExportAsFixedFormat(0, result_pdf)
-            wb_obj.Close()
-            excel.Quit()
-
-        except:
-            raise RuntimeError("Excel-to-PDF conversion requires MS Excel on Windows.")
-
-        # Annotate generated PDF
-        self.file_path = result_pdf
-        self._process_pdf(output_file)
+            except ImportError:
+                raise RuntimeError("Excel-to-PDF conversion requires MS Excel on Windows.") from None
+            except (OSError, AttributeError, comtypes.COMError) as e:
+                raise RuntimeError(f"Excel-to-PDF conversion failed: {e}") from e
+
+            # Annotate generated PDF
+            self.file_path = result_pdf
+            self._process_pdf(output_file, max_matches, compact)
+        finally:
+            self.file_path = source
+            os.unlink(result_pdf)